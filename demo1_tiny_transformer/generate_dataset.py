@@ -11,36 +11,66 @@ This script creates diverse training examples for 4 command categories:
 
 Goal: 100+ unique examples per category to improve model generalization.
 """
+import itertools
 import random
 
 
-def generate_random_word_combinations(count=100):
+# Fixed RNG seed so regenerating dataset.txt produces the same file every time
+SEED = 42
+
+# Vocabulary for generate_random_word_combinations, built once at import time
+WORDS = (
+    'the', 'a', 'an', 'this', 'that', 'my', 'your', 'our', 'their',
+    'new', 'old', 'big', 'small', 'good', 'bad', 'fast', 'slow',
+    'message', 'alert', 'notification', 'update', 'info', 'news',
+    'system', 'user', 'data', 'file', 'item', 'task', 'job',
+    'done', 'ready', 'pending', 'complete', 'failed', 'success',
+    'start', 'stop', 'begin', 'end', 'open', 'close', 'save',
+    'loading', 'saving', 'processing', 'running', 'waiting',
+    'error', 'warning', 'debug', 'critical', 'urgent',
+    'test', 'demo', 'sample', 'example', 'custom', 'special',
+    'today', 'now', 'soon', 'later', 'tomorrow', 'yesterday',
+    'all', 'some', 'any', 'each', 'every', 'many', 'few', 'more',
+    'first', 'last', 'next', 'previous', 'current', 'final',
+    'incoming', 'outgoing', 'unread', 'recent', 'latest'
+)
+
+# Longest random word combination, in words
+MAX_WORDS = 4
+
+
+def generate_random_word_combinations(count=100, rng=random):
     """Generate random word combinations to teach the model to handle arbitrary text."""
-    words = [
-        'the', 'a', 'an', 'this', 'that', 'my', 'your', 'our', 'their',
-        'new', 'old', 'big', 'small', 'good', 'bad', 'fast', 'slow',
-        'message', 'alert', 'notification', 'update', 'info', 'news',
-        'system', 'user', 'data', 'file', 'item', 'task', 'job',
-        'done', 'ready', 'pending', 'complete', 'failed', 'success',
-        'start', 'stop', 'begin', 'end', 'open', 'close', 'save',
-        'loading', 'saving', 'processing', 'running', 'waiting',
-        'error', 'warning', 'info', 'debug', 'critical', 'urgent',
-        'test', 'demo', 'sample', 'example', 'custom', 'special',
-        'today', 'now', 'soon', 'later', 'tomorrow', 'yesterday',
-        'all', 'some', 'any', 'each', 'every', 'many', 'few', 'more',
-        'first', 'last', 'next', 'previous', 'current', 'final',
-        'incoming', 'outgoing', 'unread', 'new', 'recent', 'latest'
+    # Two draws for the whole batch: one for every combination's length, one
+    # flat stream holding all of their words. Each combination is then a slice.
+    lengths = rng.choices(range(1, MAX_WORDS + 1), k=count)
+    flat = rng.choices(WORDS, k=sum(lengths))
+    offsets = list(itertools.accumulate(lengths, initial=0))
+    return [' '.join(flat[start:end]) for start, end in zip(offsets, offsets[1:])]
+
+
+def format_samples(templates, values, action, key, rng=random):
+    """
+    Render one sample per value, each phrased with a randomly chosen template.
+
+    e.g. 'INPUT: go to home OUTPUT: {"action": "navigate", "target": "home"}'
+    """
+    # Every template has exactly one '{}' placeholder, so split it into
+    # (prefix, suffix) once and build each input by concatenation instead of .format()
+    parts = [template.split('{}') for template in templates]
+
+    # The JSON output only varies by value, so serialize its constant head once
+    output_head = f' OUTPUT: {{"action": "{action}", "{key}": "'
+
+    # One batched draw for the whole category instead of a random.choice() per value
+    chosen = rng.choices(parts, k=len(values))
+    return [
+        'INPUT: ' + prefix + value + suffix + output_head + value + '"}'
+        for value, (prefix, suffix) in zip(values, chosen)
     ]
-    
-    combinations = []
-    for _ in range(count):
-        num_words = random.randint(1, 4)
-        combo = ' '.join(random.choice(words) for _ in range(num_words))
-        combinations.append(combo)
-    return combinations
 
 
-def generate_dataset():
+def generate_dataset(seed=None):
     """
     Generate training samples and return them as a list.
     
@@ -48,7 +78,11 @@ def generate_dataset():
     "INPUT: <natural language command> OUTPUT: <JSON action>"
     
     The model learns to map the natural language input to structured JSON output.
+    
+    All randomness comes from one random.Random(seed) generator, so passing
+    a seed makes the generated dataset reproducible.
     """
+    rng = random.Random(seed)
     samples = []
 
     # ==========================================================================
@@ -145,10 +179,8 @@ def generate_dataset():
         'pop up {}'            # Two-word variant
     ]
 
-    for msg in alert_messages:
-        # Randomly select a template for variety
-        template = random.choice(alert_templates)
-        samples.append(f'INPUT: {template.format(msg)} OUTPUT: {{"action": "alert", "message": "{msg}"}}')
+    # Each message gets a randomly selected template for variety
+    samples.extend(format_samples(alert_templates, alert_messages, 'alert', 'message', rng))
     
     # Add arbitrary text patterns to teach the model to extract ANY message
     # These use synthetic patterns with numbers, random words, etc.
@@ -169,22 +201,15 @@ def generate_dataset():
         'messages', 'all messages', 'new messages', 'unread messages', 'pending messages'
     ]
     
-    for msg in arbitrary_patterns:
-        template = random.choice(alert_templates)
-        samples.append(f'INPUT: {template.format(msg)} OUTPUT: {{"action": "alert", "message": "{msg}"}}')
+    samples.extend(format_samples(alert_templates, arbitrary_patterns, 'alert', 'message', rng))
     
     # Generate synthetic messages with numbers to teach number handling
-    for i in range(50):
-        num = random.randint(1, 999)
-        synthetic_msg = f'message {num}'
-        template = random.choice(alert_templates)
-        samples.append(f'INPUT: {template.format(synthetic_msg)} OUTPUT: {{"action": "alert", "message": "{synthetic_msg}"}}')
+    synthetic_msgs = [f'message {rng.randint(1, 999)}' for _ in range(50)]
+    samples.extend(format_samples(alert_templates, synthetic_msgs, 'alert', 'message', rng))
     
     # Generate random word combinations for maximum diversity
-    random_combos = generate_random_word_combinations(150)
-    for msg in random_combos:
-        template = random.choice(alert_templates)
-        samples.append(f'INPUT: {template.format(msg)} OUTPUT: {{"action": "alert", "message": "{msg}"}}')
+    random_combos = generate_random_word_combinations(150, rng)
+    samples.extend(format_samples(alert_templates, random_combos, 'alert', 'message', rng))
 
     # ==========================================================================
     # NAVIGATE COMMANDS (~100 samples)
@@ -264,9 +289,7 @@ def generate_dataset():
         'visit {}'             # Web-style phrasing
     ]
 
-    for target in navigate_targets:
-        template = random.choice(navigate_templates)
-        samples.append(f'INPUT: {template.format(target)} OUTPUT: {{"action": "navigate", "target": "{target}"}}')
+    samples.extend(format_samples(navigate_templates, navigate_targets, 'navigate', 'target', rng))
 
     # ==========================================================================
     # TOGGLE COMMANDS (~100 samples)
@@ -307,7 +330,7 @@ def generate_dataset():
         'surround_sound', 'bass_boost', 'treble_boost', 'equalizer', 'audio_normalization',
         
         # Power modes
-        'data_saver', 'low_power', 'battery_saver', 'performance_mode', 'game_mode', 'reading_mode',
+        'data_saver', 'low_power', 'battery_saver', 'performance_mode', 'game_mode',
         
         # Profiles
         'work_profile', 'personal_profile', 'guest_mode', 'kids_mode', 'driving_mode', 'walking_mode',
@@ -341,9 +364,7 @@ def generate_dataset():
         'launch {}'            # Launch verb
     ]
 
-    for setting in toggle_settings:
-        template = random.choice(toggle_templates)
-        samples.append(f'INPUT: {template.format(setting)} OUTPUT: {{"action": "toggle", "setting": "{setting}"}}')
+    samples.extend(format_samples(toggle_templates, toggle_settings, 'toggle', 'setting', rng))
 
     # ==========================================================================
     # SYSTEM COMMANDS (~100 samples)
@@ -402,8 +423,7 @@ def generate_dataset():
         ('delete', 'delete'), ('remove', 'delete'), ('delete all', 'delete'), ('remove all', 'delete')
     ]
 
-    for cmd, action in system_commands:
-        samples.append(f'INPUT: {cmd} OUTPUT: {{"action": "{action}"}}')
+    samples.extend(f'INPUT: {cmd} OUTPUT: {{"action": "{action}"}}' for cmd, action in system_commands)
 
     # ==========================================================================
     # UNRECOGNIZED INPUTS (~100 samples)
@@ -461,21 +481,27 @@ def generate_dataset():
         'make me a sandwich', 'open the pod bay doors', 'beam me up', 'engage', 'make it so'
     ]
 
-    for inp in unrecognized_inputs:
-        samples.append(f'INPUT: {inp} OUTPUT: {{"action": "unrecognized", "input": "{inp}"}}')
+    samples.extend(f'INPUT: {inp} OUTPUT: {{"action": "unrecognized", "input": "{inp}"}}' for inp in unrecognized_inputs)
 
     # ==========================================================================
-    # SHUFFLE AND RETURN
+    # DEDUPLICATE, SHUFFLE AND RETURN
     # ==========================================================================
+    # Random template choices can produce the exact same line twice (e.g. a
+    # repeated random word combination). Drop duplicates, keeping first-seen
+    # order so a seeded run stays reproducible.
+    samples = list(dict.fromkeys(samples))
+    
     # Shuffle to mix different command types together
     # This prevents the model from learning order-based patterns
-    random.shuffle(samples)
+    rng.shuffle(samples)
     return samples
 
 
 if __name__ == '__main__':
-    samples = generate_dataset()
-    with open('dataset.txt', 'w') as f:
-        for sample in samples:
-            f.write(sample + '\n')
+    samples = generate_dataset(SEED)
+    # Encode the whole corpus once and write it as a single bytes buffer
+    # instead of one write() per line
+    payload = ('\n'.join(samples) + '\n').encode('utf-8')
+    with open('dataset.txt', 'wb') as f:
+        f.write(payload)
     print(f'Generated {len(samples)} unique samples')
\ No newline at end of file